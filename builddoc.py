@@ -1,312 +1,522 @@
 #!/usr/bin/env python3
 
 import argparse
+import base64
+import functools
+import hashlib
 import os
 import re
 import subprocess
 import sys
 import tempfile
 import shutil
+import stat
+import threading
 from pathlib import Path
 
 try:
     import requests
     import json
+    import websocket
+    from markdown_it import MarkdownIt
 except ImportError as e:
     print(f"Missing required package: {e}")
     print("Please install required packages using: pip install -r requirements.txt")
     sys.exit(1)
 
 
+# Markdown renderer with GitHub-flavoured tables, strikethrough, autolinks and line breaks
+_MD = MarkdownIt('commonmark', {'html': True, 'linkify': True, 'breaks': True}).enable(
+    ['table', 'strikethrough', 'linkify']
+)
+
+# Markdown image references: ![alt](path)
+_IMAGE_RE = re.compile(r'!\[[^\]]*\]\(([^)]+)\)')
+
+# Mermaid.js include in the template, dropped for documents without diagrams
+_MERMAID_SCRIPT_RE = re.compile(r'<script src="[^"]*/mermaid[^"]*"></script>')
+
+# Injected before </body> to render diagrams and highlight code once the page is loaded
+_IMMEDIATE_SCRIPT = """
+<script>
+// Render diagrams and highlight code as soon as all libraries are loaded
+async function processContent() {
+    if (window.DEBUG_BUILDDOC) console.log('All libraries loaded, starting content processing...');
+    
+    try {
+        // Render Mermaid diagrams
+        if (typeof mermaid !== 'undefined') {
+            prepareMermaidDiagrams();
+            await renderMermaidDiagrams();
+        }
+        
+        // Highlight code blocks
+        if (typeof Prism !== 'undefined') {
+            Prism.highlightAll();
+        }
+        
+        if (window.DEBUG_BUILDDOC) console.log('Content processed successfully');
+    } catch (error) {
+        console.error('Error in content processing:', error);
+    } finally {
+        window.contentReady = true;
+    }
+}
+
+if (document.readyState === 'complete') {
+    processContent();
+} else {
+    window.addEventListener('load', processContent);
+}
+</script>
+"""
+
+# Enables console logging in the injected script
+_DEBUG_SCRIPT = '<script>window.DEBUG_BUILDDOC = true;</script>'
+
+# Injected before </head> for proper badge rendering and image sizing
+_BADGE_CSS = """
+<style>
+/* Ensure badges render as images, not text */
+img[src*="img.shields.io"] {
+    display: inline-block !important;
+    margin: 2px 4px !important;
+    border: none !important;
+    max-height: 20px !important;
+    vertical-align: middle !important;
+}
+
+/* Make document images larger and more readable */
+.markdown-body img:not([src*="img.shields.io"]) {
+    max-width: 100% !important;
+    height: auto !important;
+    display: block !important;
+    margin: 20px auto !important;
+    border: 1px solid #ddd !important;
+    border-radius: 8px !important;
+    box-shadow: 0 2px 8px rgba(0,0,0,0.1) !important;
+    min-height: 200px !important;
+}
+
+/* Specific styling for screenshots */
+img[src*="xml-1.png"], img[src*="xml2.png"], img[src*="discount_breakdown.jpeg"] {
+    width: 90% !important;
+    height: auto !important;
+    max-width: none !important;
+    min-height: auto !important;
+    object-fit: contain !important;
+}
+
+/* Fix emoji rendering */
+.markdown-body {
+    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "Noto Sans", Helvetica, Arial, sans-serif !important;
+}
+</style>
+"""
+
+# Chrome executables to try, in order
+_CHROME_PATHS = (
+    'google-chrome',
+    'chromium',
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+    '/usr/bin/google-chrome',
+    '/usr/bin/chromium-browser',
+)
+
+# Flags for single-file --print-to-pdf conversions, split around the output path
+_CHROME_PDF_FLAGS_PRE = (
+    '--headless',
+    '--disable-gpu',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-extensions',
+    '--disable-plugins',
+)
+_CHROME_PDF_FLAGS_POST = (
+    '--print-to-pdf-no-header',
+    '--print-to-pdf-no-footer',
+    '--disable-print-preview',
+    '--run-all-compositor-stages-before-draw',
+    '--virtual-time-budget=2000',  # Wait 2 seconds for Mermaid and Prism to complete
+    '--margin-top=1cm',
+    '--margin-bottom=1cm',
+    '--margin-left=1cm',
+    '--margin-right=1cm',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--allow-file-access-from-files',  # Allow local file access
+    '--disable-features=TranslateUI',
+    '--disable-ipc-flooding-protection',
+)
+
+# Flags for the long-lived headless Chrome driven over the DevTools Protocol
+_CHROME_DEVTOOLS_FLAGS = (
+    '--headless',
+    '--remote-debugging-port=0',
+    '--disable-gpu',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--disable-web-security',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--allow-file-access-from-files',
+    '--disable-features=TranslateUI',
+)
+
+# Sends page console messages to Chrome's stderr when BUILDDOC_DEBUG=1
+_CHROME_DEBUG_FLAGS = (
+    '--enable-logging=stderr',
+    '--log-level=0',
+)
+
+_DEVTOOLS_URL_RE = re.compile(r'DevTools listening on (ws://\S+)')
+
+# Resolves once diagrams are rendered and code is highlighted (or after 20 seconds)
+_CONTENT_READY_SCRIPT = """
+new Promise(function(resolve) {
+    const deadline = Date.now() + 20000;
+    (function check() {
+        if (window.contentReady || Date.now() > deadline) {
+            resolve(true);
+            return;
+        }
+        setTimeout(check, 100);
+    })();
+})
+"""
+
+# 1cm page margins, in inches
+_PDF_MARGIN = 1 / 2.54
+
+
+def _debug_enabled() -> bool:
+    """Whether BUILDDOC_DEBUG=1 asks for console logging in the generated page"""
+    return os.environ.get('BUILDDOC_DEBUG') == '1'
+
+
+@functools.lru_cache(maxsize=8)
+def _read_template_version(template_file: Path, mtime_ns: int) -> str:
+    """Read one version of an HTML template, identified by its modification time"""
+    return template_file.read_text(encoding='utf-8')
+
+
+def _read_template(template_file: Path) -> str:
+    """Read an HTML template, reusing the cached text until the file changes"""
+    return _read_template_version(template_file, template_file.stat().st_mtime_ns)
+
+
+def _print_chrome_install_help(last_error: str = None) -> None:
+    """Print installation hints when no usable Chrome/Chromium was found"""
+    print("Error: Chrome/Chromium not found. Please install Chrome or Chromium.")
+    print("On macOS: brew install --cask google-chrome")
+    print("On Ubuntu: sudo apt-get install google-chrome-stable")
+    print("On macOS: brew install chromium")
+    print("On Ubuntu: sudo apt-get install chromium-browser")
+    if last_error:
+        print(f"Last error: {last_error}")
+
+
+class _ChromeDevTools:
+    """Minimal DevTools Protocol client for one headless Chrome shared across documents"""
+    
+    def __init__(self, process: subprocess.Popen, websocket_url: str, user_data_dir: str, chrome_path: str):
+        self.process = process
+        self.chrome_path = chrome_path
+        self.user_data_dir = user_data_dir
+        self.connection = websocket.create_connection(websocket_url, timeout=90)
+        self._last_id = 0
+        self._events = []
+    
+    @classmethod
+    def launch(cls, chrome_paths) -> '_ChromeDevTools':
+        """Start headless Chrome with remote debugging and connect to it"""
+        user_data_dir = tempfile.mkdtemp()
+        for chrome_path in chrome_paths:
+            chrome_cmd = [chrome_path, *_CHROME_DEVTOOLS_FLAGS, f'--user-data-dir={user_data_dir}']
+            if _debug_enabled():
+                chrome_cmd.extend(_CHROME_DEBUG_FLAGS)
+            chrome_cmd.append('about:blank')
+            try:
+                process = subprocess.Popen(chrome_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            except FileNotFoundError:
+                continue
+            
+            print(f"Started Chrome: {chrome_path}")
+            websocket_url = cls._read_websocket_url(process)
+            if websocket_url:
+                try:
+                    return cls(process, websocket_url, user_data_dir, chrome_path)
+                except Exception as e:
+                    # Don't orphan a Chrome we could not connect to
+                    print(f"Chrome error with {chrome_path}: {e}")
+            else:
+                print(f"Chrome error with {chrome_path}: DevTools endpoint not available")
+            process.kill()
+            process.wait()
+        
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+        _print_chrome_install_help()
+        raise Exception("No working Chrome/Chromium installation found")
+    
+    @staticmethod
+    def _read_websocket_url(process: subprocess.Popen) -> str:
+        """Read the browser DevTools endpoint Chrome announces on stderr"""
+        # Give up on a Chrome that never announces its endpoint
+        watchdog = threading.Timer(30, process.kill)
+        watchdog.start()
+        try:
+            for line in iter(process.stderr.readline, b''):
+                match = _DEVTOOLS_URL_RE.search(line.decode('utf-8', 'replace'))
+                if match:
+                    # Keep draining stderr so Chrome never blocks on a full pipe
+                    threading.Thread(target=_ChromeDevTools._drain_stderr, args=(process.stderr,), daemon=True).start()
+                    return match.group(1)
+        finally:
+            watchdog.cancel()
+        return None
+    
+    @staticmethod
+    def _drain_stderr(stream) -> None:
+        """Consume Chrome's stderr, echoing it when BUILDDOC_DEBUG=1"""
+        debug = _debug_enabled()
+        for line in iter(stream.readline, b''):
+            if debug:
+                print(line.decode('utf-8', 'replace').rstrip())
+    
+    def call(self, method: str, params: dict = None, session_id: str = None) -> dict:
+        """Send a DevTools command and wait for its result, buffering any events"""
+        self._last_id += 1
+        message = {'id': self._last_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        self.connection.send(json.dumps(message))
+        
+        while True:
+            response = json.loads(self.connection.recv())
+            if response.get('id') == self._last_id:
+                if 'error' in response:
+                    raise Exception(f"{method} failed: {response['error'].get('message')}")
+                return response.get('result', {})
+            if 'method' in response:
+                self._events.append(response)
+    
+    def wait_for_event(self, method: str, session_id: str, **params) -> dict:
+        """Wait for a DevTools event emitted by the given session whose params match"""
+        while True:
+            for event in self._events:
+                if (event['method'] == method and event.get('sessionId') == session_id
+                        and all(event.get('params', {}).get(key) == value for key, value in params.items())):
+                    self._events.remove(event)
+                    return event.get('params', {})
+            message = json.loads(self.connection.recv())
+            if 'method' in message:
+                self._events.append(message)
+    
+    def print_to_pdf(self, html_file: str, output_file: str) -> None:
+        """Load an HTML file in a new tab, wait for rendering and save it as PDF"""
+        target_id = self.call('Target.createTarget', {'url': 'about:blank'})['targetId']
+        try:
+            session_id = self.call('Target.attachToTarget', {'targetId': target_id, 'flatten': True})['sessionId']
+            self.call('Page.enable', session_id=session_id)
+            self.call('Page.setLifecycleEventsEnabled', {'enabled': True}, session_id)
+            navigation = self.call('Page.navigate', {'url': Path(html_file).resolve().as_uri()}, session_id)
+            if navigation.get('errorText'):
+                raise Exception(f"Could not load {html_file}: {navigation['errorText']}")
+            # Match the load of this navigation, not the tab's initial about:blank
+            self.wait_for_event('Page.lifecycleEvent', session_id, name='load', loaderId=navigation['loaderId'])
+            self.call('Runtime.evaluate', {'expression': _CONTENT_READY_SCRIPT, 'awaitPromise': True}, session_id)
+            
+            result = self.call('Page.printToPDF', {
+                'printBackground': True,
+                'displayHeaderFooter': False,
+                'marginTop': _PDF_MARGIN,
+                'marginBottom': _PDF_MARGIN,
+                'marginLeft': _PDF_MARGIN,
+                'marginRight': _PDF_MARGIN,
+            }, session_id)
+            Path(output_file).write_bytes(base64.b64decode(result['data']))
+        finally:
+            # Don't let a failed close (e.g. after a timeout) hide the original error
+            try:
+                self.call('Target.closeTarget', {'targetId': target_id})
+            except Exception as e:
+                print(f"Warning: Could not close Chrome tab: {e}")
+            self._events.clear()
+    
+    def close(self) -> None:
+        """Disconnect and shut down Chrome"""
+        try:
+            self.connection.close()
+        finally:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 class ModernMarkdownToPDFConverter:
-    def __init__(self, input_file: str, output_file: str = None):
+    # Chrome executable that worked last, shared by all conversions in the process
+    _chrome_path_cache = None
+    
+    def __init__(self, input_file: str, output_file: str = None, force: bool = False):
         self.input_file = input_file
+        self.force = force
         self.output_file = output_file or self._generate_output_filename()
-        self.temp_dir = tempfile.mkdtemp()
         self.template_file = Path(__file__).parent / 'template.html'
         
+    @functools.cached_property
+    def _markdown(self) -> str:
+        """Markdown source, read once and shared by every processing step"""
+        return Path(self.input_file).read_text(encoding='utf-8', errors='replace')
+    
     def _generate_output_filename(self) -> str:
         """Generate output PDF filename based on input file"""
         input_path = Path(self.input_file)
         return str(input_path.with_suffix('.pdf'))
     
+    def _generate_key_filename(self) -> str:
+        """Generate the cache key filename stored next to the output PDF"""
+        return self.output_file + '.key'
+    
+    def _compute_cache_key(self) -> str:
+        """Hash everything the generated page depends on so unchanged inputs can skip conversion"""
+        digest = hashlib.blake2b(self._markdown.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(_read_template(self.template_file).encode('utf-8'))
+        # The injected CSS/script and renderer options live in this module
+        digest.update(b'\0')
+        digest.update(Path(__file__).read_bytes())
+        digest.update(b'\0debug' if _debug_enabled() else b'\0')
+        # Referenced local images end up in the PDF as well
+        for image_file in sorted(set(self._iter_image_files())):
+            image_stat = os.stat(image_file)
+            digest.update(f'\0{image_file}\0{image_stat.st_size}\0{image_stat.st_mtime_ns}'.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _is_output_up_to_date(self, cache_key: str) -> bool:
+        """Check whether the existing PDF was generated from identical inputs"""
+        key_file = Path(self._generate_key_filename())
+        if not key_file.exists() or not os.path.exists(self.output_file):
+            return False
+        # The HTML is part of the output too
+        if not os.path.exists(self._generate_html_filename()):
+            return False
+        return key_file.read_text(encoding='utf-8').strip() == cache_key
+    
     def _generate_html_filename(self) -> str:
         """Generate HTML filename based on input file"""
         input_path = Path(self.input_file)
         return str(input_path.with_suffix('.html'))
     
-    def _prepare_working_directory(self) -> str:
-        """Prepare working directory with template and markdown file"""
-        # Copy template to working directory
-        template_dest = os.path.join(self.temp_dir, 'template.html')
-        shutil.copy2(self.template_file, template_dest)
-        
-        # Copy markdown file to working directory
-        markdown_dest = os.path.join(self.temp_dir, os.path.basename(self.input_file))
-        shutil.copy2(self.input_file, markdown_dest)
-        
-        # Copy any image files referenced in the markdown
-        self._copy_referenced_files()
-        
-        return template_dest
-    
-    def _copy_referenced_files(self):
-        """Copy image files and other assets referenced in the markdown"""
-        try:
-            with open(self.input_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Find image references
-            image_pattern = r'!\[.*?\]\(([^)]+)\)'
-            for match in re.finditer(image_pattern, content):
-                image_path = match.group(1)
-                if os.path.exists(image_path):
-                    dest_path = os.path.join(self.temp_dir, os.path.basename(image_path))
-                    shutil.copy2(image_path, dest_path)
-                    print(f"Copied image: {image_path} -> {dest_path}")
-        except Exception as e:
-            print(f"Warning: Could not copy referenced files: {e}")
+    def _iter_image_paths(self):
+        """Yield the image paths referenced in the markdown"""
+        # Skip the regex entirely when there are no image references
+        if '![' not in self._markdown:
+            return
+        for match in _IMAGE_RE.finditer(self._markdown):
+            yield match.group(1)
     
-    def _escape_for_javascript(self, text: str) -> str:
-        """
-        Escape text for safe embedding in JavaScript template literals.
-        This function handles all special characters that could break JavaScript.
-        """
-        if not text:
-            return ""
-        
-        # Convert to string if not already
-        text = str(text)
-        
-        # Escape characters that are problematic in JavaScript template literals
-        # Order matters - escape backslashes first
-        escaped = text.replace('\\', '\\\\')  # Escape backslashes
-        escaped = escaped.replace('`', '\\`')  # Escape backticks
-        escaped = escaped.replace('${', '\\${')  # Escape template literal expressions
-        escaped = escaped.replace('\r\n', '\\n')  # Windows line endings
-        escaped = escaped.replace('\r', '\\n')    # Mac line endings
-        escaped = escaped.replace('\n', '\\n')    # Unix line endings
-        
-        # Escape other potentially problematic characters
-        escaped = escaped.replace('\t', '\\t')    # Tabs
-        escaped = escaped.replace('\b', '\\b')    # Backspace
-        escaped = escaped.replace('\f', '\\f')    # Form feed
-        escaped = escaped.replace('\v', '\\v')    # Vertical tab
-        
-        # Escape quotes that could break the string
-        escaped = escaped.replace('"', '\\"')     # Double quotes
-        escaped = escaped.replace("'", "\\'")     # Single quotes
-        
-        return escaped
+    def _iter_image_files(self):
+        """Yield the existing local image files referenced in the markdown"""
+        base_dir = os.path.dirname(os.path.abspath(self.input_file))
+        for image_path in self._iter_image_paths():
+            # Drop an optional title, as in ![alt](path "title")
+            parts = image_path.split()
+            if not parts:
+                continue
+            image_file = os.path.join(base_dir, parts[0].strip('<>'))
+            # URLs and missing files simply don't resolve to a local file
+            if os.path.isfile(image_file):
+                yield image_file
     
     def _create_html_document(self) -> str:
-        """Create HTML document using the template approach with embedded markdown"""
-        template_path = self._prepare_working_directory()
-
-        # Read the template
-        with open(template_path, 'r', encoding='utf-8') as f:
-            template_content = f.read()
-
-        # Read the markdown content
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            markdown_content = f.read()
-
-
-        # Use robust JavaScript string escaping that preserves Unicode
-        escaped_markdown = self._escape_for_javascript(markdown_content)
-
-        # Replace the fetch approach with embedded content
-        template_content = template_content.replace(
-            "const CONFIG = {\n            markdownFile: 'synth.md',\n            mermaidTheme: 'default',\n            mermaidWaitTime: 3000\n        };",
-            f"const CONFIG = {{\n            markdownContent: `{escaped_markdown}`,\n            mermaidTheme: 'default',\n            mermaidWaitTime: 3000\n        }};"
-        )
-
-        # Update the loadMarkdownFile function to use embedded content
-        template_content = template_content.replace(
-            "async function loadMarkdownFile() {\n            try {\n                const response = await fetch(CONFIG.markdownFile);\n                if (!response.ok) {\n                    throw new Error(`HTTP error! status: ${response.status}`);\n                }\n                const markdownText = await response.text();\n                return markdownText;\n            } catch (error) {\n                console.error('Error loading markdown file:', error);\n                throw error;\n            }\n        }",
-            "async function loadMarkdownFile() {\n            try {\n                return CONFIG.markdownContent;\n            } catch (error) {\n                console.error('Error loading markdown content:', error);\n                throw error;\n            }\n        }"
-        )
+        """Create HTML document using the template approach with pre-rendered markdown"""
 
+        # The template is cached and shared by every conversion until it changes
+        template_content = _read_template(self.template_file)
 
-        # Add immediate execution script to ensure content is rendered
-        immediate_script = """
-        <script>
-        // Wait for all libraries to load before processing
-        window.addEventListener('load', function() {
-            console.log('All libraries loaded, starting content processing...');
-            
-            // Wait a bit more to ensure everything is ready
-            setTimeout(function() {
-                const markdownContent = CONFIG.markdownContent;
-                const contentDiv = document.getElementById('content');
-                const loadingDiv = document.getElementById('loading');
-                
-                if (contentDiv && markdownContent && typeof marked !== 'undefined') {
-                    try {
-                        console.log('Processing markdown content...');
-                        
-                        // Configure Marked.js with custom renderer
-                        const renderer = new marked.Renderer();
-                        
-                        renderer.image = function(href, title, text) {
-                            console.log('Rendering image:', {href, title, text});
-                            const titleAttr = title ? ` title="${title}"` : '';
-                            return `<img src="${href}" alt="${text}"${titleAttr} style="display: inline-block; margin: 2px; border: none; max-height: 20px;">`;
-                        };
-                        
-                        renderer.link = function(href, title, text) {
-                            console.log('Rendering link:', {href, title, text});
-                            const titleAttr = title ? ` title="${title}"` : '';
-                            return `<a href="${href}"${titleAttr}>${text}</a>`;
-                        };
-                        
-                        marked.setOptions({ 
-                            renderer: renderer,
-                            breaks: true,
-                            gfm: true,
-                            pedantic: false,
-                            sanitize: false,
-                            smartLists: true,
-                            smartypants: false
-                        });
-                        
-                        // Parse markdown
-                        console.log('Markdown content length:', markdownContent.length);
-                        console.log('Markdown content preview:', markdownContent.substring(0, 500));
-                        const htmlContent = marked.parse(markdownContent);
-                        console.log('Parsed HTML length:', htmlContent.length);
-                        contentDiv.innerHTML = htmlContent;
-                        
-                        // Hide loading, show content
-                        loadingDiv.style.display = 'none';
-                        contentDiv.style.display = 'block';
-                        
-                        // Highlight code blocks
-                        if (typeof Prism !== 'undefined') {
-                            Prism.highlightAll();
-                        }
-                        
-                        console.log('Content processed successfully');
-                    } catch (error) {
-                        console.error('Error in content processing:', error);
-                        loadingDiv.innerHTML = `<div class="error">Error processing content: ${error.message}</div>`;
-                    }
-                } else {
-                    console.error('Missing dependencies:', {
-                        contentDiv: !!contentDiv,
-                        markdownContent: !!markdownContent,
-                        marked: typeof marked
-                    });
-                }
-            }, 1000);
-        });
-        </script>
-        """
-        
-        # Add CSS for proper badge rendering and image sizing
-        badge_css = """
-        <style>
-        /* Ensure badges render as images, not text */
-        img[src*="img.shields.io"] {
-            display: inline-block !important;
-            margin: 2px 4px !important;
-            border: none !important;
-            max-height: 20px !important;
-            vertical-align: middle !important;
-        }
+        # Don't make Chrome fetch and initialize Mermaid when no diagram can be present
+        if 'mermaid' not in self._markdown:
+            template_content = _MERMAID_SCRIPT_RE.sub('', template_content, count=1)
         
-        /* Make document images larger and more readable */
-        .markdown-body img:not([src*="img.shields.io"]) {
-            max-width: 100% !important;
-            height: auto !important;
-            display: block !important;
-            margin: 20px auto !important;
-            border: 1px solid #ddd !important;
-            border-radius: 8px !important;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1) !important;
-            min-height: 200px !important;
-        }
-        
-        /* Specific styling for screenshots */
-        img[src*="xml-1.png"], img[src*="xml2.png"], img[src*="discount_breakdown.jpeg"] {
-            width: 90% !important;
-            height: auto !important;
-            max-width: none !important;
-            min-height: auto !important;
-            object-fit: contain !important;
-        }
-        
-        /* Fix emoji rendering */
-        .markdown-body {
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "Noto Sans", Helvetica, Arial, sans-serif !important;
-        }
-        </style>
-        """
+        # Console logging in the page is opt-in via BUILDDOC_DEBUG=1
+        immediate_script = _IMMEDIATE_SCRIPT
+        if _debug_enabled():
+            immediate_script = _DEBUG_SCRIPT + immediate_script
         
         # Insert CSS before closing head tag and script before closing body tag
-        template_content = template_content.replace('</head>', badge_css + '</head>')
-        template_content = template_content.replace('</body>', immediate_script + '</body>')
+        template_content = (
+            template_content
+            .replace('</head>', _BADGE_CSS + '</head>', 1)
+            .replace('</body>', immediate_script + '</body>', 1)
+        )
+
+        # Render the markdown in Python and insert it last, so the tag
+        # replacements above never touch the document content
+        html_body = _MD.render(self._markdown)
+        template_content = template_content.replace('__CONTENT__', html_body, 1)
 
         return template_content
     
+    @classmethod
+    def _chrome_candidates(cls):
+        """Yield the Chrome executables worth trying, the cached one first if known"""
+        cached_path = cls._chrome_path_cache
+        if cached_path:
+            yield cached_path
+            # Only resumed when the cached executable failed: forget it and probe the rest
+            cls._chrome_path_cache = None
+        
+        for path in _CHROME_PATHS:
+            if path != cached_path and (shutil.which(path) or os.path.exists(path)):
+                yield path
+    
     def _convert_html_to_pdf_with_chrome(self, html_file: str) -> None:
         """Convert HTML to PDF using Chrome headless with enhanced waiting for JavaScript"""
         
-        # Try different Chrome paths
-        chrome_paths = [
-            'google-chrome',
-            'chromium',
-            '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
-            '/usr/bin/google-chrome',
-            '/usr/bin/chromium-browser'
-        ]
-        
-        chrome_cmd_base = [
-            '--headless',
-            '--disable-gpu',
-            '--no-sandbox',
-            '--disable-dev-shm-usage',
-            '--disable-extensions',
-            '--disable-plugins',
-            '--print-to-pdf=' + self.output_file,
-            '--print-to-pdf-no-header',
-            '--print-to-pdf-no-footer',
-            '--disable-print-preview',
-            '--run-all-compositor-stages-before-draw',
-            '--virtual-time-budget=20000',  # Wait 20 seconds for JavaScript to complete
-            '--margin-top=1cm',
-            '--margin-bottom=1cm',
-            '--margin-left=1cm',
-            '--margin-right=1cm',
-            '--disable-web-security',
-            '--disable-features=VizDisplayCompositor',
-            '--disable-background-timer-throttling',
-            '--disable-backgrounding-occluded-windows',
-            '--disable-renderer-backgrounding',
-            '--allow-file-access-from-files',  # Allow local file access
-            '--disable-features=TranslateUI',
-            '--disable-ipc-flooding-protection',
-            html_file
-        ]
-        
         success = False
         last_error = None
         
-        for chrome_path in chrome_paths:
+        # Try the Chrome paths that are actually installed
+        for chrome_path in self._chrome_candidates():
             try:
-                chrome_cmd = [chrome_path] + chrome_cmd_base
+                chrome_cmd = [
+                    chrome_path,
+                    *_CHROME_PDF_FLAGS_PRE,
+                    f'--print-to-pdf={self.output_file}',
+                    *_CHROME_PDF_FLAGS_POST,
+                    *(_CHROME_DEBUG_FLAGS if _debug_enabled() else ()),
+                    html_file,
+                ]
                 print(f"Trying Chrome path: {chrome_path}")
                 print(f"Converting HTML to PDF with enhanced JavaScript support...")
-                # Add a delay to ensure JavaScript execution
-                import time
 
-                result = subprocess.run(chrome_cmd, capture_output=True, text=True, timeout=90)
+                # Only stderr is inspected, and only decoded when Chrome fails or when debugging
+                result = subprocess.run(chrome_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=90)
                 if result.returncode == 0:
+                    type(self)._chrome_path_cache = chrome_path
+                    if _debug_enabled():
+                        print(result.stderr.decode('utf-8', 'replace'))
                     success = True
                     break
                 else:
-                    last_error = result.stderr
-                    print(f"Chrome error with {chrome_path}: {result.stderr}")
+                    last_error = result.stderr.decode('utf-8', 'replace')
+                    print(f"Chrome error with {chrome_path}: {last_error}")
             except FileNotFoundError:
                 continue
             except subprocess.TimeoutExpired:
@@ -314,53 +524,110 @@ class ModernMarkdownToPDFConverter:
                 continue
         
         if not success:
-            print("Error: Chrome/Chromium not found. Please install Chrome or Chromium.")
-            print("On macOS: brew install --cask google-chrome")
-            print("On Ubuntu: sudo apt-get install google-chrome-stable")
-            print("On macOS: brew install chromium")
-            print("On Ubuntu: sudo apt-get install chromium-browser")
-            if last_error:
-                print(f"Last error: {last_error}")
+            _print_chrome_install_help(last_error)
             raise Exception("No working Chrome/Chromium installation found")
     
+    def _write_html_file(self):
+        """Write the HTML document for the PDF, or return None if the PDF is up to date"""
+        # Check if template exists
+        if not self.template_file.exists():
+            raise FileNotFoundError(f"Template file not found: {self.template_file}")
+        
+        # Skip the conversion when neither the markdown nor the template changed
+        cache_key = self._compute_cache_key()
+        if not self.force and self._is_output_up_to_date(cache_key):
+            print(f"PDF is up to date (cached): {self.output_file}")
+            return None
+        
+        # Invalidate the old key now so a failed run can't leave a stale PDF marked fresh
+        Path(self._generate_key_filename()).unlink(missing_ok=True)
+        
+        # Create HTML document using template approach
+        full_html = self._create_html_document()
+        
+        # Generate HTML file name
+        html_file = self._generate_html_filename()
+        
+        # Save HTML file in a single write to a temporary name, then swap it into
+        # place so an interrupted run never leaves a truncated HTML file behind
+        tmp_file = tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', buffering=1 << 20, delete=False,
+            dir=os.path.dirname(os.path.abspath(html_file)),
+            prefix=os.path.basename(html_file) + '.', suffix='.tmp',
+        )
+        try:
+            with tmp_file:
+                tmp_file.write(full_html)
+            # Temporary files are private (0600); keep the existing HTML's mode, or
+            # give a new file the mode a plain open() would under the current umask
+            try:
+                mode = stat.S_IMODE(os.stat(html_file).st_mode)
+            except FileNotFoundError:
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0o666 & ~umask
+            os.chmod(tmp_file.name, mode)
+            os.replace(tmp_file.name, html_file)
+        except BaseException:
+            # Don't leave a partial temporary file behind
+            os.remove(tmp_file.name)
+            raise
+        print(f"HTML file created: {html_file}")
+        
+        return html_file, cache_key
+    
+    def _finish_conversion(self, cache_key: str) -> None:
+        """Record the cache key for the new PDF"""
+        print(f"PDF created successfully: {self.output_file}")
+        Path(self._generate_key_filename()).write_text(cache_key, encoding='utf-8')
+    
     def convert(self):
-        """Main conversion method using JavaScript-based approach"""
+        """Main conversion method"""
         try:
             print(f"Processing {self.input_file}...")
-            print("Using JavaScript-based markdown conversion with Mermaid support...")
+            print("Rendering markdown with Mermaid support...")
             
-            # Check if template exists
-            if not self.template_file.exists():
-                raise FileNotFoundError(f"Template file not found: {self.template_file}")
-            
-            # Create HTML document using template approach
-            full_html = self._create_html_document()
-            
-            # Generate HTML file name
-            html_file = self._generate_html_filename()
-            
-            # Save HTML file
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(full_html)
-            print(f"HTML file created: {html_file}")
+            prepared = self._write_html_file()
+            if prepared is None:
+                return
+            html_file, cache_key = prepared
             
             # Convert HTML to PDF using Chrome with enhanced JavaScript support
             print("Converting to PDF using Chrome with JavaScript rendering...")
             self._convert_html_to_pdf_with_chrome(html_file)
             
-            print(f"PDF created successfully: {self.output_file}")
-            
-            # Cleanup temporary directory
-            try:
-                if os.path.exists(self.temp_dir):
-                    shutil.rmtree(self.temp_dir)
-            except OSError:
-                # Directory not empty, ignore
-                pass
+            self._finish_conversion(cache_key)
                 
         except Exception as e:
             print(f"Error converting file: {e}")
             sys.exit(1)
+    
+    @classmethod
+    def convert_many(cls, input_files, force: bool = False):
+        """Convert several markdown files, sharing a single headless Chrome instance"""
+        try:
+            jobs = []
+            for input_file in input_files:
+                print(f"Processing {input_file}...")
+                converter = cls(input_file, force=force)
+                prepared = converter._write_html_file()
+                if prepared is not None:
+                    jobs.append((converter, *prepared))
+            
+            if not jobs:
+                return
+            
+            # Start Chrome once and print every document through the DevTools Protocol
+            print(f"Converting {len(jobs)} file(s) to PDF using a shared Chrome instance...")
+            with _ChromeDevTools.launch(cls._chrome_candidates()) as chrome:
+                cls._chrome_path_cache = chrome.chrome_path
+                for converter, html_file, cache_key in jobs:
+                    chrome.print_to_pdf(html_file, converter.output_file)
+                    converter._finish_conversion(cache_key)
+                    
+        except Exception as e:
+            print(f"Error converting files: {e}")
+            sys.exit(1)
 
 
 def main():
@@ -368,25 +635,40 @@ def main():
         description="JavaScript-based Markdown to PDF converter with Mermaid support using Chrome"
     )
     parser.add_argument(
-        'file',
-        nargs='?',
-        default='README.md',
-        help='Input markdown file (default: README.md)'
+        'files',
+        nargs='*',
+        default=['README.md'],
+        help='Input markdown file(s) (default: README.md)'
     )
     parser.add_argument(
         '-o', '--output',
         help='Output PDF file path'
     )
+    parser.add_argument(
+        '-f', '--force',
+        action='store_true',
+        help='Regenerate the PDF even if the markdown and template are unchanged'
+    )
     
     args = parser.parse_args()
     
-    # Check if input file exists
-    if not os.path.exists(args.file):
-        print(f"Error: Input file '{args.file}' not found")
+    if args.output and len(args.files) > 1:
+        print("Error: --output can only be used with a single input file")
         sys.exit(1)
     
+    # Check if input files exist
+    for input_file in args.files:
+        if not os.path.exists(input_file):
+            print(f"Error: Input file '{input_file}' not found")
+            sys.exit(1)
+    
+    # Several files share one Chrome instance
+    if len(args.files) > 1:
+        ModernMarkdownToPDFConverter.convert_many(args.files, args.force)
+        return
+    
     # Create converter and convert
-    converter = ModernMarkdownToPDFConverter(args.file, args.output)
+    converter = ModernMarkdownToPDFConverter(args.files[0], args.output, args.force)
     converter.convert()
 
 